@@ -1,15 +1,85 @@
 """
 Hand Tracking Module with MediaPipe
 Detects hand gestures and outputs direction commands (Up/Down/Left/Right)
+
+Uses the MediaPipe Tasks HandLandmarker, which needs the hand_landmarker.task
+model bundle in backend/models/ (downloaded automatically on first run) or at
+$HAND_LANDMARKER_MODEL (see DEFAULT_MODEL_PATH).
 """
 
+import os
+import time
+import urllib.request
 import cv2
 import mediapipe as mp
 import numpy as np
+from mediapipe.tasks.python import BaseOptions
+from mediapipe.tasks.python import vision
+
+# Hand landmarker model bundle, downloaded into backend/models/ on first run
+MODEL_URL = 'https://storage.googleapis.com/mediapipe-models/hand_landmarker/hand_landmarker/float16/1/hand_landmarker.task'
+BUNDLED_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'hand_landmarker.task')
+
+# Set HAND_LANDMARKER_MODEL to use a different bundle, e.g. an int8-quantized
+# one for faster CPU (XNNPACK) inference
+DEFAULT_MODEL_PATH = os.environ.get('HAND_LANDMARKER_MODEL', BUNDLED_MODEL_PATH)
+
+# Landmark indices sent to the frontend overlay, with their joint types
+JOINT_INDICES = [0, 4, 8, 12, 16, 20, 5, 9, 13, 17]
+JOINT_TYPES = [
+    'wrist', 'thumb_tip', 'index_tip', 'middle_tip', 'ring_tip', 'pinky_tip',
+    'mcp', 'mcp', 'mcp', 'mcp'
+]
+
+# Direction names indexed by the code returned from _classify
+DIRECTIONS = (None, "Up", "Down", "Left", "Right")
+
+# Minimum MCP-to-tip length for the index finger to count as extended
+MIN_INDEX_LENGTH = 0.08
+
+
+def download_model(path=BUNDLED_MODEL_PATH, url=MODEL_URL):
+    """Download the hand landmarker model bundle to path"""
+    print(f"⬇️ Downloading hand landmarker model to {path}...")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    
+    # Download to a temporary file so an interrupted download isn't mistaken for the model
+    tmp_path = path + '.part'
+    urllib.request.urlretrieve(url, tmp_path)
+    os.replace(tmp_path, path)
+    print("✅ Model downloaded")
+
+
+def _classify(dx, dy, index_length, threshold):
+    """
+    Classify the wrist-to-index-tip vector into a direction code
+    
+    Returns:
+        0 (none), 1 (Up), 2 (Down), 3 (Left) or 4 (Right); see DIRECTIONS
+    """
+    # Only detect direction if finger is extended enough (pointing gesture)
+    if index_length <= MIN_INDEX_LENGTH:
+        return 0
+    
+    # Determine direction based on dominant axis
+    if abs(dy) > abs(dx):
+        # Vertical pointing (y decreases upward)
+        if dy < -threshold:
+            return 1
+        if dy > threshold:
+            return 2
+    else:
+        # Horizontal pointing
+        if dx < -threshold:
+            return 3
+        if dx > threshold:
+            return 4
+    return 0
 
 
 class HandTracker:
-    def __init__(self, max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.5):
+    def __init__(self, max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.5,
+                 model_path=DEFAULT_MODEL_PATH, use_gpu=True):
         """
         Initialize MediaPipe Hand Tracking
         
@@ -17,14 +87,34 @@ class HandTracker:
             max_num_hands: Maximum number of hands to detect
             min_detection_confidence: Minimum confidence for hand detection
             min_tracking_confidence: Minimum confidence for hand tracking
+            model_path: Path to the hand_landmarker.task model bundle
+            use_gpu: Run inference on the GPU delegate, falling back to CPU if unavailable
         """
-        self.mp_hands = mp.solutions.hands
-        self.mp_draw = mp.solutions.drawing_utils
-        self.hands = self.mp_hands.Hands(
-            max_num_hands=max_num_hands,
-            min_detection_confidence=min_detection_confidence,
-            min_tracking_confidence=min_tracking_confidence
-        )
+        if not os.path.exists(model_path):
+            if model_path != BUNDLED_MODEL_PATH:
+                raise FileNotFoundError(f"Hand landmarker model not found at {model_path}")
+            download_model(model_path)
+        
+        delegates = [BaseOptions.Delegate.GPU, BaseOptions.Delegate.CPU] if use_gpu else [BaseOptions.Delegate.CPU]
+        for delegate in delegates:
+            options = vision.HandLandmarkerOptions(
+                base_options=BaseOptions(model_asset_path=model_path, delegate=delegate),
+                running_mode=vision.RunningMode.VIDEO,
+                num_hands=max_num_hands,
+                min_hand_detection_confidence=min_detection_confidence,
+                min_tracking_confidence=min_tracking_confidence
+            )
+            try:
+                self.landmarker = vision.HandLandmarker.create_from_options(options)
+                break
+            except (RuntimeError, NotImplementedError) as e:
+                if delegate == delegates[-1]:
+                    raise
+                print(f"⚠️ GPU delegate unavailable ({e}), falling back to CPU")
+        
+        # Timestamp of the last frame sent to the landmarker (VIDEO mode needs
+        # strictly increasing timestamps)
+        self._last_timestamp_ms = 0
         
         # Gesture detection parameters
         self.previous_direction = None
@@ -35,152 +125,136 @@ class HandTracker:
         # Previous hand position for movement tracking
         self.previous_wrist_pos = None
         
+        # Inference resolution (width, height); MediaPipe's palm detector runs at
+        # 192x192 internally, so larger input only adds preprocessing cost
+        self.infer_size = (320, 240)
+        
+        # Reusable buffers for the downscaled BGR frame, its RGB conversion and
+        # the signature thumbnail, so the hot path allocates no image arrays
+        infer_w, infer_h = self.infer_size
+        self._small_buf = np.empty((infer_h, infer_w, 3), dtype=np.uint8)
+        self._rgb_buf = np.empty((infer_h, infer_w, 3), dtype=np.uint8)
+        self._thumb_buf = np.empty((16, 16, 3), dtype=np.uint8)
+        self._thumb_gray_buf = np.empty((16, 16), dtype=np.uint8)
+        
+        # Resolution-dependent values, recomputed only when the frame size changes
+        self._shape_cache = None
+        self._max_wh = None
+        self._wh_vec = None
+        
+        # Near-duplicate frame detection: reuse the last result while the scene
+        # signature stays within this many differing bits (of 256)
+        self.duplicate_bit_threshold = 8
+        self._last_signature = None
+        self._last_result = None
+        
+        # Run inference at least every this many frames even if the scene looks
+        # unchanged, so small fingertip turns are never missed for long
+        self.max_skipped_frames = 3
+        self._skipped_frames = 0
+        
+    def _frame_signature(self, small):
+        """Compute a 32-byte signature of a frame from a 16x16 grayscale thumbnail"""
+        cv2.resize(small, (16, 16), dst=self._thumb_buf, interpolation=cv2.INTER_AREA)
+        thumb = cv2.cvtColor(self._thumb_buf, cv2.COLOR_BGR2GRAY, dst=self._thumb_gray_buf)
+        return np.packbits((thumb > thumb.mean()).ravel())
+    
     def detect_gesture(self, frame):
         """
         Process frame and detect hand gesture direction
         
+        Nothing is drawn on the frame; the frontend renders the overlay from
+        the returned hand data.
+        
         Args:
             frame: BGR frame from webcam
             
         Returns:
             direction: "Up", "Down", "Left", "Right", or None
-            annotated_frame: Frame with hand landmarks drawn
+            hand_data: Hand position data for frontend overlay, or None
         """
-        # Convert BGR to RGB
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(frame_rgb)
+        # Downscale for inference; landmarks come back normalized to [0, 1],
+        # so they map onto the full-resolution frame unchanged
+        small = cv2.resize(frame, self.infer_size, dst=self._small_buf, interpolation=cv2.INTER_AREA)
+        
+        # Skip inference when the frame is nearly identical to the last one
+        # with a hand in it (e.g. the user is holding still)
+        signature = self._frame_signature(small)
+        if self._last_result is not None and self._shape_cache == frame.shape[:2]:
+            changed_bits = int(np.unpackbits(signature ^ self._last_signature).sum())
+            if changed_bits < self.duplicate_bit_threshold and self._skipped_frames < self.max_skipped_frames:
+                self._skipped_frames += 1
+                direction, hand_data = self._last_result
+                
+                # The hand is holding still, so report no movement
+                return direction, dict(hand_data, movement_dx=0, movement_dy=0, has_previous_pos=True)
+        self._skipped_frames = 0
+        
+        # Convert BGR to RGB into the reusable buffer (mp.Image rejects the
+        # non-contiguous frame[..., ::-1] view, and cvtColor's SIMD path is far
+        # faster than a reversed-stride copy)
+        cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=self._rgb_buf)
+        
+        timestamp_ms = max(int(time.monotonic() * 1000), self._last_timestamp_ms + 1)
+        self._last_timestamp_ms = timestamp_ms
+        results = self.landmarker.detect_for_video(mp_image, timestamp_ms)
         
         direction = None
-        annotated_frame = frame.copy()
         hand_data = None
         
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                # Draw hand landmarks
-                self.mp_draw.draw_landmarks(
-                    annotated_frame, 
-                    hand_landmarks, 
-                    self.mp_hands.HAND_CONNECTIONS
-                )
-                
-                # Get key landmarks for direction detection
-                landmarks = hand_landmarks.landmark
-                h, w, _ = frame.shape
+        # Refresh cached resolution values on resolution change
+        if self._shape_cache != frame.shape[:2]:
+            self._shape_cache = frame.shape[:2]
+            h, w = self._shape_cache
+            self._max_wh = max(w, h)
+            self._wh_vec = np.array([w, h], dtype=np.float32)
+        h, w = self._shape_cache
+        
+        if results.hand_landmarks:
+            for landmarks in results.hand_landmarks:
+                # Pull all 21 normalized (x, y) landmark coordinates into one array
+                pts = np.fromiter(
+                    (v for lm in landmarks for v in (lm.x, lm.y)),
+                    dtype=np.float32,
+                    count=42
+                ).reshape(21, 2)
                 
                 # Use index finger pointing direction for gesture detection
                 # This is more intuitive: point up/down/left/right with index finger
-                wrist = landmarks[0]
-                index_mcp = landmarks[5]  # Index finger MCP (base)
-                index_tip = landmarks[8]  # Index finger tip
+                # Landmarks: wrist (0), index MCP (5), index tip (8), middle MCP (9)
+                wrist, index_mcp_pt, index_tip_pt, middle_mcp_pt = pts[[0, 5, 8, 9]]
+                wrist_nx, wrist_ny = wrist.tolist()
                 
-                # Convert normalized coordinates to pixel coordinates
-                wrist_x = int(wrist.x * w)
-                wrist_y = int(wrist.y * h)
+                # Get key joint positions in pixel coordinates; the wrist is the
+                # first joint, so its pixel position comes from the same array
+                pix = (pts[JOINT_INDICES] * self._wh_vec).astype(np.int32).tolist()
+                wrist_x, wrist_y = pix[0]
                 
                 # Calculate hand size for scaling lines (distance from wrist to middle finger MCP)
-                middle_mcp = landmarks[9]
-                hand_scale = ((wrist.x - middle_mcp.x)**2 + (wrist.y - middle_mcp.y)**2)**0.5
-                hand_scale_pixels = int(hand_scale * max(w, h))
+                hand_scale = float(np.hypot(*(wrist - middle_mcp_pt)))
+                hand_scale_pixels = int(hand_scale * self._max_wh)
                 
                 # Calculate direction vector from wrist to index tip
                 # This represents where the finger is pointing
-                dx = index_tip.x - wrist.x
-                dy = index_tip.y - wrist.y
+                dx, dy = (index_tip_pt - wrist).tolist()
                 
                 # Also check if index finger is extended (distance from MCP to tip)
-                index_length = ((index_tip.x - index_mcp.x)**2 + (index_tip.y - index_mcp.y)**2)**0.5
+                index_length = float(np.hypot(*(index_tip_pt - index_mcp_pt)))
                 
                 # Calculate movement from previous frame (before updating)
                 movement_dx = 0
                 movement_dy = 0
                 has_previous_pos = self.previous_wrist_pos is not None
                 if has_previous_pos:
-                    movement_dx = wrist.x - self.previous_wrist_pos[0]
-                    movement_dy = wrist.y - self.previous_wrist_pos[1]
-                
-                # Draw green and red lines to show hand movement
-                # Line length scales with hand size
-                line_length = max(80, hand_scale_pixels * 3)
-                line_thickness = max(3, int(hand_scale_pixels * 0.4))
-                
-                # Always draw lines when hand is detected
-                # Horizontal line (green for right movement, red for left movement)
-                if has_previous_pos and abs(movement_dx) > 0.01:  # Significant horizontal movement
-                    if movement_dx > 0:
-                        # Moving right - green arrow line
-                        cv2.arrowedLine(
-                            annotated_frame,
-                            (wrist_x, wrist_y),
-                            (wrist_x + line_length, wrist_y),
-                            (0, 255, 0),  # Green
-                            line_thickness,
-                            tipLength=0.3
-                        )
-                    else:
-                        # Moving left - red arrow line
-                        cv2.arrowedLine(
-                            annotated_frame,
-                            (wrist_x, wrist_y),
-                            (wrist_x - line_length, wrist_y),
-                            (0, 0, 255),  # Red
-                            line_thickness,
-                            tipLength=0.3
-                        )
-                else:
-                    # No significant movement or first frame - draw neutral gray line
-                    cv2.line(
-                        annotated_frame,
-                        (wrist_x - line_length // 2, wrist_y),
-                        (wrist_x + line_length // 2, wrist_y),
-                        (128, 128, 128),  # Gray
-                        line_thickness
-                    )
-                
-                # Vertical line (green for up movement, red for down movement)
-                if has_previous_pos and abs(movement_dy) > 0.01:  # Significant vertical movement
-                    if movement_dy < 0:
-                        # Moving up - green line
-                        cv2.arrowedLine(
-                            annotated_frame,
-                            (wrist_x, wrist_y),
-                            (wrist_x, wrist_y - line_length),
-                            (0, 255, 0),  # Green
-                            line_thickness,
-                            tipLength=0.3
-                        )
-                    else:
-                        # Moving down - red line
-                        cv2.arrowedLine(
-                            annotated_frame,
-                            (wrist_x, wrist_y),
-                            (wrist_x, wrist_y + line_length),
-                            (0, 0, 255),  # Red
-                            line_thickness,
-                            tipLength=0.3
-                        )
-                else:
-                    # No significant movement or first frame - draw neutral gray line
-                    cv2.line(
-                        annotated_frame,
-                        (wrist_x, wrist_y - line_length // 2),
-                        (wrist_x, wrist_y + line_length // 2),
-                        (128, 128, 128),  # Gray
-                        line_thickness
-                    )
+                    movement_dx = wrist_nx - self.previous_wrist_pos[0]
+                    movement_dy = wrist_ny - self.previous_wrist_pos[1]
                 
-                # Get key joint positions for visualization
-                # Finger tips
-                thumb_tip = landmarks[4]
-                index_tip = landmarks[8]
-                middle_tip = landmarks[12]
-                ring_tip = landmarks[16]
-                pinky_tip = landmarks[20]
-                
-                # Key joints (MCP joints)
-                index_mcp = landmarks[5]
-                middle_mcp = landmarks[9]
-                ring_mcp = landmarks[13]
-                pinky_mcp = landmarks[17]
+                # Joint list for visualization
+                joints = [
+                    {'x': x, 'y': y, 'type': joint_type}
+                    for (x, y), joint_type in zip(pix, JOINT_TYPES)
+                ]
                 
                 # Store hand data for frontend overlay
                 hand_data = {
@@ -192,61 +266,30 @@ class HandTracker:
                     'has_previous_pos': has_previous_pos,
                     'frame_width': w,
                     'frame_height': h,
-                    'joints': [
-                        {'x': int(wrist.x * w), 'y': int(wrist.y * h), 'type': 'wrist'},
-                        {'x': int(thumb_tip.x * w), 'y': int(thumb_tip.y * h), 'type': 'thumb_tip'},
-                        {'x': int(index_tip.x * w), 'y': int(index_tip.y * h), 'type': 'index_tip'},
-                        {'x': int(middle_tip.x * w), 'y': int(middle_tip.y * h), 'type': 'middle_tip'},
-                        {'x': int(ring_tip.x * w), 'y': int(ring_tip.y * h), 'type': 'ring_tip'},
-                        {'x': int(pinky_tip.x * w), 'y': int(pinky_tip.y * h), 'type': 'pinky_tip'},
-                        {'x': int(index_mcp.x * w), 'y': int(index_mcp.y * h), 'type': 'mcp'},
-                        {'x': int(middle_mcp.x * w), 'y': int(middle_mcp.y * h), 'type': 'mcp'},
-                        {'x': int(ring_mcp.x * w), 'y': int(ring_mcp.y * h), 'type': 'mcp'},
-                        {'x': int(pinky_mcp.x * w), 'y': int(pinky_mcp.y * h), 'type': 'mcp'}
-                    ]
+                    'joints': joints
                 }
                 
-                # Update previous position after all drawing is complete
-                self.previous_wrist_pos = (wrist.x, wrist.y)
-                
-                # Only detect direction if finger is extended enough (pointing gesture)
-                if index_length > 0.08:  # Finger is extended
-                    abs_dx = abs(dx)
-                    abs_dy = abs(dy)
-                    
-                    # Determine direction based on dominant axis
-                    if abs_dy > abs_dx:
-                        # Vertical pointing
-                        if dy < -self.direction_threshold:  # Pointing up (y decreases upward)
-                            direction = "Up"
-                        elif dy > self.direction_threshold:  # Pointing down
-                            direction = "Down"
-                    else:
-                        # Horizontal pointing
-                        if dx < -self.direction_threshold:  # Pointing left
-                            direction = "Left"
-                        elif dx > self.direction_threshold:  # Pointing right
-                            direction = "Right"
+                # Update previous position for the next frame
+                self.previous_wrist_pos = (wrist_nx, wrist_ny)
                 
-                # Draw direction text on frame
-                if direction:
-                    cv2.putText(
-                        annotated_frame,
-                        f"Direction: {direction}",
-                        (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        1,
-                        (0, 255, 0),
-                        2
-                    )
+                # Classify pointing direction
+                direction = DIRECTIONS[_classify(dx, dy, index_length, self.direction_threshold)]
         else:
             # Reset previous position when hand is not detected
             self.previous_wrist_pos = None
         
-        return direction, annotated_frame, hand_data
+        # Only cache results with a hand so its disappearance is never missed
+        if hand_data:
+            self._last_signature = signature
+            self._last_result = (direction, hand_data)
+        else:
+            self._last_signature = None
+            self._last_result = None
+        
+        return direction, hand_data
     
     def cleanup(self):
         """Release resources"""
-        if hasattr(self, 'hands'):
-            self.hands.close()
+        if hasattr(self, 'landmarker'):
+            self.landmarker.close()
 
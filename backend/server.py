@@ -3,22 +3,91 @@ Flask Server with WebSocket Support for Real-time Gesture Detection
 Processes webcam frames and sends direction commands (Up/Down/Left/Right)
 """
 
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import cv2
 import numpy as np
-import base64
+import queue
 import time
 from hand_tracker import HandTracker
 
 app = Flask(__name__)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
 # Initialize hand tracker
 hand_tracker = HandTracker()
 
+# Single-slot queue between the socket handler and the inference worker.
+# Holds at most one pending (sid, frame, received_at); newer frames replace older ones.
+frame_queue = queue.Queue(maxsize=1)
+
+# Frames that waited longer than this (seconds) are skipped instead of processed
+MAX_FRAME_AGE = 0.1
+
+def enqueue_frame(sid, frame):
+    """Queue a frame for inference, dropping the pending one if the slot is full"""
+    while True:
+        try:
+            frame_queue.put_nowait((sid, frame, time.monotonic()))
+            return
+        except queue.Full:
+            # Drop the stale frame; another handler thread may race us for the slot
+            try:
+                frame_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+def pack_hand_data(hand_data):
+    """
+    Pack hand data into a little-endian int16 buffer for binary transfer
+    
+    Layout (28 values, 56 bytes): wrist_x, wrist_y, movement_dx * 1000,
+    movement_dy * 1000, hand_scale_pixels, has_previous_pos, frame_width,
+    frame_height, then x, y for each joint in hand_tracker.JOINT_TYPES order
+    """
+    values = [
+        hand_data['wrist_x'],
+        hand_data['wrist_y'],
+        round(hand_data['movement_dx'] * 1000),
+        round(hand_data['movement_dy'] * 1000),
+        hand_data['hand_scale_pixels'],
+        int(hand_data['has_previous_pos']),
+        hand_data['frame_width'],
+        hand_data['frame_height']
+    ]
+    for joint in hand_data['joints']:
+        values.extend((joint['x'], joint['y']))
+    return np.array(values, dtype='<i2').tobytes()
+
+def inference_worker():
+    """Consume queued frames, run gesture detection and emit results to the sender"""
+    while True:
+        sid, frame, received_at = frame_queue.get()
+        
+        # Skip frames that went stale while the previous one was processed
+        if time.monotonic() - received_at > MAX_FRAME_AGE:
+            continue
+        
+        try:
+            # Runs on its own OS thread; MediaPipe releases the GIL during inference
+            direction, hand_data = hand_tracker.detect_gesture(frame)
+            
+            # Send direction command and overlay data back to client in one message
+            if direction or hand_data:
+                socketio.emit('frame_result', {
+                    'direction': direction,
+                    'timestamp': int(time.time() * 1000),  # Milliseconds timestamp
+                    'hand': pack_hand_data(hand_data) if hand_data else None
+                }, to=sid)
+                if direction:
+                    print(f"📤 Sent gesture command: {direction}")
+        
+        except Exception as e:
+            print(f"❌ Error processing frame: {str(e)}")
+            socketio.emit('error', {'message': str(e)}, to=sid)
+
 @app.route('/')
 def home():
     return jsonify({"message": "Server is running!", "status": "ready"})
@@ -40,40 +109,21 @@ def handle_frame(data):
     Process webcam frame from client and detect gestures
     
     Args:
-        data: Dictionary containing base64 encoded frame
+        data: Raw JPEG bytes sent as a binary Socket.IO payload
     """
     try:
-        # Decode base64 image
-        image_data = data.get('image', '')
-        if not image_data:
+        if not data:
             return
         
-        # Remove data URL prefix if present
-        if ',' in image_data:
-            image_data = image_data.split(',')[1]
-        
-        # Decode base64 to numpy array
-        nparr = np.frombuffer(base64.b64decode(image_data), np.uint8)
+        # Decode JPEG bytes to numpy array
+        nparr = np.frombuffer(data, np.uint8)
         frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
         if frame is None:
             return
         
-        # Detect gesture
-        direction, annotated_frame, hand_data = hand_tracker.detect_gesture(frame)
-        
-        # Send direction command back to client
-        if direction:
-            emit('gesture_command', {
-                'direction': direction,
-                'status': 'success',
-                'timestamp': int(time.time() * 1000)  # Milliseconds timestamp
-            })
-            print(f"📤 Sent gesture command: {direction}")
-        
-        # Send hand position data for overlay drawing
-        if hand_data:
-            emit('hand_data', hand_data)
+        # Hand off to the inference worker
+        enqueue_frame(request.sid, frame)
         
     except Exception as e:
         print(f"❌ Error processing frame: {str(e)}")
@@ -95,4 +145,5 @@ if __name__ == '__main__':
     print("🚀 Starting Flask server with WebSocket support...")
     print("📡 Server running on http://localhost:5000")
     print("🔌 WebSocket ready for real-time communication")
+    socketio.start_background_task(inference_worker)
     socketio.run(app, host='0.0.0.0', port=5000, debug=True, allow_unsafe_werkzeug=True)
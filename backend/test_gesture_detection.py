@@ -3,18 +3,52 @@ Test script for gesture detection
 Run this to test hand tracking and gesture detection locally
 """
 
+import sys
 import cv2
+import numpy as np
 from hand_tracker import HandTracker
 
+def render_label(text, scale, color):
+    """Rasterize a text label once; returns (overlay, mask, ascent) for blitting"""
+    (text_w, text_h), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, 2)
+    pad = 2  # Room for the stroke thickness around the glyph box
+    overlay = np.zeros((text_h + baseline + 2 * pad, text_w + 2 * pad, 3), dtype=np.uint8)
+    cv2.putText(overlay, text, (pad, text_h + pad), cv2.FONT_HERSHEY_SIMPLEX, scale, color, 2)
+    mask = overlay.any(axis=2, keepdims=True)
+    return overlay, mask, text_h + pad
+
+def blit_label(frame, label, origin):
+    """Copy a pre-rendered label onto the frame with its text baseline at origin"""
+    overlay, mask, ascent = label
+    x, y = origin[0], origin[1] - ascent
+    roi = frame[y:y + overlay.shape[0], x:x + overlay.shape[1]]
+    np.copyto(roi, overlay, where=mask)
+
 def main():
     print("🎯 Starting gesture detection test...")
     print("📋 Instructions:")
     print("   - Point your index finger Up/Down/Left/Right")
     print("   - Press 'q' to quit")
     
-    cap = cv2.VideoCapture(0)
+    cap = cv2.VideoCapture(0, cv2.CAP_V4L2 if sys.platform.startswith('linux') else cv2.CAP_ANY)
+    
+    # Request MJPEG at a modest resolution so the camera can deliver 30 FPS,
+    # and keep only one buffered frame so reads are never stale
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    cap.set(cv2.CAP_PROP_FPS, 30)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    
     tracker = HandTracker()
     
+    # Pre-render status labels so the loop doesn't rasterize text every frame
+    gesture_labels = {
+        direction: render_label(f"Gesture: {direction}", 1, (0, 255, 0))
+        for direction in ("Up", "Down", "Left", "Right")
+    }
+    no_gesture_label = render_label("No gesture detected", 0.7, (0, 0, 255))
+    
     if not cap.isOpened():
         print("❌ Cannot access webcam")
         return
@@ -27,32 +61,21 @@ def main():
             continue
         
         # Detect gesture
-        direction, annotated_frame = tracker.detect_gesture(frame)
+        direction, hand_data = tracker.detect_gesture(frame)
+        
+        # Draw detected joints (the tracker no longer annotates the frame)
+        if hand_data:
+            for joint in hand_data['joints']:
+                cv2.circle(frame, (joint['x'], joint['y']), 5, (0, 255, 153), -1)
         
         # Display result
         if direction:
             print(f"📤 Detected gesture: {direction}")
-            cv2.putText(
-                annotated_frame,
-                f"Gesture: {direction}",
-                (10, 60),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                1,
-                (0, 255, 0),
-                2
-            )
+            blit_label(frame, gesture_labels[direction], (10, 60))
         else:
-            cv2.putText(
-                annotated_frame,
-                "No gesture detected",
-                (10, 60),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (0, 0, 255),
-                2
-            )
+            blit_label(frame, no_gesture_label, (10, 60))
         
-        cv2.imshow('Gesture Detection Test', annotated_frame)
+        cv2.imshow('Gesture Detection Test', frame)
         
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
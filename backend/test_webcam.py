@@ -1,7 +1,16 @@
+import sys
 import cv2
 
 # Initialize webcam (0 = default camera)
-cap = cv2.VideoCapture(0)
+cap = cv2.VideoCapture(0, cv2.CAP_V4L2 if sys.platform.startswith('linux') else cv2.CAP_ANY)
+
+# Request MJPEG at a modest resolution so the camera can deliver 30 FPS,
+# and keep only one buffered frame so reads are never stale
+cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+cap.set(cv2.CAP_PROP_FPS, 30)
+cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
 
 if not cap.isOpened():
     print("❌ Cannot access webcam")
@@ -6,6 +6,16 @@ let frameInterval = null;
 let isTracking = false;
 let snakeGame = null;
 
+// Joint types in the order they appear in the packed hand data buffer
+const JOINT_TYPES = [
+  'wrist', 'thumb_tip', 'index_tip', 'middle_tip', 'ring_tip', 'pinky_tip',
+  'mcp', 'mcp', 'mcp', 'mcp'
+];
+
+// Latest-frame-wins upload: at most one frame in flight, one waiting
+let frameInFlight = false;
+let pendingFrame = null;
+
 // Latency monitoring
 let gestureTimestamps = [];
 let latencyStats = {
@@ -26,33 +36,20 @@ function initializeSocket() {
 
   socket.on('disconnect', () => {
     console.log('❌ WebSocket disconnected');
+    resetFrameUpload();
     updateStatus('❌ Disconnected from server', '#ff5555');
   });
 
-  socket.on('gesture_command', (data) => {
-    const receiveTime = Date.now();
-    console.log('📥 Received gesture command:', data);
-    
-    // Calculate latency if timestamp is provided
-    if (data.timestamp) {
-      const latency = receiveTime - data.timestamp;
-      updateLatencyStats(latency);
+  socket.on('frame_result', (data) => {
+    if (data.direction) {
+      handleGestureCommand(data);
     }
-    
-    displayGesture(data.direction);
-    
-    // Send direction to Snake game (invert left/right for mirrored camera)
-    if (snakeGame && snakeGame.gameRunning) {
-      const invertedDirection = invertLeftRight(data.direction);
-      snakeGame.handleDirection(invertedDirection);
+    if (data.hand) {
+      // Draw lines on overlay canvas based on hand position data
+      drawHandLines(unpackHandData(data.hand));
     }
   });
 
-  socket.on('hand_data', (data) => {
-    // Draw lines on overlay canvas based on hand position data
-    drawHandLines(data);
-  });
-
   socket.on('response', (data) => {
     console.log('📨 Server response:', data.message);
   });
@@ -63,6 +60,49 @@ function initializeSocket() {
   });
 }
 
+function handleGestureCommand(data) {
+  const receiveTime = Date.now();
+  console.log('📥 Received gesture command:', data.direction);
+  
+  // Calculate latency if timestamp is provided
+  if (data.timestamp) {
+    const latency = receiveTime - data.timestamp;
+    updateLatencyStats(latency);
+  }
+  
+  displayGesture(data.direction);
+  
+  // Send direction to Snake game (invert left/right for mirrored camera)
+  if (snakeGame && snakeGame.gameRunning) {
+    const invertedDirection = invertLeftRight(data.direction);
+    snakeGame.handleDirection(invertedDirection);
+  }
+}
+
+// Decode the packed little-endian int16 hand data buffer sent by the server
+function unpackHandData(buffer) {
+  const view = new DataView(buffer);
+  const read = (index) => view.getInt16(index * 2, true);
+  
+  const joints = JOINT_TYPES.map((type, i) => ({
+    x: read(8 + i * 2),
+    y: read(9 + i * 2),
+    type
+  }));
+  
+  return {
+    wrist_x: read(0),
+    wrist_y: read(1),
+    movement_dx: read(2) / 1000,
+    movement_dy: read(3) / 1000,
+    hand_scale_pixels: read(4),
+    has_previous_pos: read(5) === 1,
+    frame_width: read(6),
+    frame_height: read(7),
+    joints
+  };
+}
+
 // 2️⃣ Check Backend Connection (HTTP)
 async function checkBackendConnection() {
   const statusElement = document.getElementById("status");
@@ -180,6 +220,7 @@ function stopFrameCapture() {
     clearInterval(frameInterval);
     frameInterval = null;
   }
+  resetFrameUpload();
 }
 
 function captureAndSendFrame() {
@@ -192,16 +233,41 @@ function captureAndSendFrame() {
     const ctx = canvas.getContext('2d');
     ctx.drawImage(webcamVideo, 0, 0, canvas.width, canvas.height);
     
-    // Convert canvas to base64 image
-    const imageData = canvas.toDataURL('image/jpeg', 0.7);
-    
-    // Send frame to server via WebSocket
-    socket.emit('frame', { image: imageData });
+    // Encode canvas as JPEG and send the raw bytes as a binary WebSocket frame
+    canvas.toBlob(async (blob) => {
+      if (!blob || !socket || !socket.connected) return;
+      const buffer = await blob.arrayBuffer();
+      sendFrame(buffer);
+    }, 'image/jpeg', 0.6);
   } catch (error) {
     console.error('Error capturing frame:', error);
   }
 }
 
+function sendFrame(buffer) {
+  // While the server hasn't acknowledged the previous frame, keep only the
+  // newest one so stale frames never queue up
+  if (frameInFlight) {
+    pendingFrame = buffer;
+    return;
+  }
+  
+  frameInFlight = true;
+  socket.emit('frame', buffer, () => {
+    frameInFlight = false;
+    if (pendingFrame && isTracking && socket.connected) {
+      const next = pendingFrame;
+      pendingFrame = null;
+      sendFrame(next);
+    }
+  });
+}
+
+function resetFrameUpload() {
+  frameInFlight = false;
+  pendingFrame = null;
+}
+
 // 5️⃣ Display Gesture Commands
 const gestureDisplay = document.getElementById("gestureDisplay");
 const gestureHistory = document.getElementById("gestureHistory");